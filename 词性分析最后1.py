@@ -1,20 +1,266 @@
 import sys
+import os
+import gc
 import spacy
 import csv
+import re
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait as futures_wait
+from concurrent.futures.process import BrokenProcessPool
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from enum import IntEnum
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QTextEdit, QPushButton, QVBoxLayout,
     QWidget, QLabel, QHBoxLayout, QMessageBox, QTableWidget, QTableWidgetItem,
-    QFileDialog, QSplitter, QFrame, QStyleFactory, QProgressBar, QDialog, QTabWidget
+    QTableView, QFileDialog, QSplitter, QFrame, QStyleFactory, QProgressBar, QDialog,
+    QTabWidget
 )
-from PyQt5.QtGui import QTextCharFormat, QColor, QSyntaxHighlighter, QFont, QPalette
-from PyQt5.QtCore import Qt
+from PyQt5.QtGui import (
+    QTextCharFormat, QColor, QSyntaxHighlighter, QFont, QPalette, QTextBlockUserData
+)
+from PyQt5.QtCore import (
+    Qt, QAbstractTableModel, QModelIndex, QPoint, QTimer, QEvent
+)
+
+
+class PhraseCategory(IntEnum):
+    """短语分类编号（结果中只保存编号，不重复保存分类全名）"""
+    AN = 0
+    AAN = 1
+    NN = 2
+    NNN = 3
+    ANN = 4
+    PNN = 5
+    PN = 6
+    CN = 7
+    AAPN = 8
+    PREP_OF = 9
+    PREP_OTHER = 10
+    NAN = 11
+    OTHER = 12
+
+
+# 分类全名，按分类编号索引
+CATEGORY_NAMES = (
+    'Attributive adjectives + Noun (AN)',
+    'Adjectives + adjectives + Noun (AAN)',
+    'Noun + Noun (NN)',
+    'Noun + Noun + Noun (NNN)',
+    'Adjectives + Noun + Noun (ANN)',
+    'Possessive nouns + Noun (PnN)',
+    'Participles + Noun (PN)',
+    'Compounds + Noun (CN)',
+    'Adverb + Adjective/Participle + Noun (aA/PN)',
+    'Of phrase as noun post-modifiers (PrepOF)',
+    'Other prepositional phrases',
+    'Appositive noun phrase (NAn)',
+    'Other'
+)
+
+# 各分类的判断依据，按分类编号索引
+CATEGORY_BASES = (
+    '形容词(修饰语) + 名词(中心语)的基本结构',
+    '双形容词(修饰语) + 名词(中心语)的结构',
+    '名词(修饰语) + 名词(中心语)的复合结构',
+    '三个名词构成的复合结构',
+    '形容词(修饰语) + 双名词复合结构',
+    '包含所有格标记的名词修饰结构',
+    '分词(作形容词用) + 名词的结构',
+    '复合词结构',
+    '副词 + 形容词/分词 + 名词的结构',
+    "包含'of'介词短语的后置修饰结构",
+    '包含其他介词的后置修饰结构',
+    '同位语名词短语结构',
+    '不符合上述任何分类模式的其他结构'
+)
+
+
+def format_reason(structure, category_id):
+    """由结构分析和分类编号生成判断依据文本"""
+    return f"词序分析: {structure}\n判断依据: {CATEGORY_BASES[category_id]}"
+
+
+class PhraseRecord:
+    """单条短语结果，只保存偏移量和编号，文本按需从结果存储中取出"""
+    __slots__ = ('store', 'start', 'end', 'category_id', 'structure_id')
+
+    def __init__(self, store, start, end, category_id, structure_id):
+        self.store = store
+        self.start = start
+        self.end = end
+        self.category_id = category_id
+        self.structure_id = structure_id
+
+    @property
+    def phrase(self):
+        return self.store.source[self.start:self.end]
+
+    @property
+    def category(self):
+        return CATEGORY_NAMES[self.category_id]
+
+    @property
+    def structure(self):
+        return self.store.structures[self.structure_id]
+
+    @property
+    def reason(self):
+        return format_reason(self.structure, self.category_id)
+
+
+class PhraseResultStore:
+    """紧凑的短语结果存储
+
+    偏移量、分类编号和结构编号分别保存在 array 列中，短语文本按偏移量
+    从原文切片获得，相同的结构分析字符串只保存一份。偏移量按 Python 字符
+    计数，与 Qt 的 UTF-16 位置之间用 to_utf16/from_utf16 换算。
+    """
+    # BMP 以外的字符（如 emoji）在 UTF-16 中占两个单位
+    _ASTRAL = re.compile('[\U00010000-\U0010FFFF]')
+
+    def __init__(self, source=""):
+        self.source = source
+        self.astral = array('I', (m.start() for m in self._ASTRAL.finditer(source)))
+        self.astral_utf16 = array('I', (index + i for i, index in enumerate(self.astral)))
+        self.starts = array('I')
+        self.ends = array('I')
+        self.category_ids = array('B')
+        self.structure_ids = array('I')
+        self.structures = []
+        self._structure_index = {}
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        for start, end, category_id, structure_id in zip(
+                self.starts, self.ends, self.category_ids, self.structure_ids):
+            yield PhraseRecord(self, start, end, category_id, structure_id)
+
+    def append(self, start, end, category_id, structure):
+        """追加一条结果，短语需按在原文中的顺序追加"""
+        structure_id = self._structure_index.get(structure)
+        if structure_id is None:
+            structure_id = len(self.structures)
+            self.structures.append(structure)
+            self._structure_index[structure] = structure_id
+
+        self.starts.append(start)
+        self.ends.append(end)
+        self.category_ids.append(category_id)
+        self.structure_ids.append(structure_id)
+
+    def phrase(self, row):
+        return self.source[self.starts[row]:self.ends[row]]
+
+    def category(self, row):
+        return CATEGORY_NAMES[self.category_ids[row]]
+
+    def structure(self, row):
+        return self.structures[self.structure_ids[row]]
+
+    def reason(self, row):
+        return format_reason(self.structure(row), self.category_ids[row])
+
+    def column_text(self, row, column):
+        """按表格列号取出文本：短语、结构分析、分类、判断依据"""
+        if column == 0:
+            return self.phrase(row)
+        if column == 1:
+            return self.structure(row)
+        if column == 2:
+            return self.category(row)
+        return self.reason(row)
+
+    def columns(self):
+        """返回不含原文的列数据，供进程间传递"""
+        return (self.starts, self.ends, self.category_ids, self.structure_ids, self.structures)
+
+    @classmethod
+    def from_columns(cls, source, columns):
+        """由原文和 columns() 返回的列数据重建结果存储"""
+        store = cls(source)
+        store.starts, store.ends, store.category_ids, store.structure_ids, store.structures = columns
+        store._structure_index = {structure: i for i, structure in enumerate(store.structures)}
+        return store
+
+    def rows(self):
+        """逐行生成导出用的数据"""
+        for record in self:
+            yield (record.phrase, record.structure, record.category, record.reason)
+
+    def to_utf16(self, position):
+        """把原文中的字符位置换算为 UTF-16 位置"""
+        return position + bisect_left(self.astral, position)
+
+    def from_utf16(self, position):
+        """把 UTF-16 位置换算为原文中的字符位置"""
+        return position - bisect_left(self.astral_utf16, position)
+
+    def spans_in_range(self, start, end):
+        """返回与原文区间 [start, end) 相交的结果行号范围"""
+        # 名词短语互不重叠且按顺序追加，因此起止偏移量都是有序的
+        first = bisect_right(self.ends, start)
+        last = bisect_left(self.starts, end)
+        return range(first, max(first, last))
+
+
+class PhraseTableModel(QAbstractTableModel):
+    """直接读取 PhraseResultStore 的表格模型，不为每个单元格创建对象"""
+    HEADERS = ["短语", "结构分析", "分类", "判断依据"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.store = PhraseResultStore()
+
+    def set_store(self, store):
+        self.beginResetModel()
+        self.store = store
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.store)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        return self.store.column_text(index.row(), index.column())
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return section + 1
+
+
+class _HighlightMark(QTextBlockUserData):
+    """标记文本块已在某一轮高亮中处理过，随文本块移动，不受行号变化影响"""
+
+    def __init__(self, generation):
+        super().__init__()
+        self.generation = generation
 
 
 class PhraseHighlighter(QSyntaxHighlighter):
+    """按需高亮短语：先处理可见的文本块，其余文本块在空闲时分批处理"""
+    # 每次空闲处理的时间上限（秒）
+    time_budget = 0.015
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.phrases = []
-        self.categories = []
+        self.results = PhraseResultStore()
+        self._generation = None
+        self._watched_document = None
+        self._pending = None
+        self._timer = QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._highlight_slice)
 
         # 为每种分类类型设置不同的高亮颜色
         self.category_colors = {
@@ -32,25 +278,126 @@ class PhraseHighlighter(QSyntaxHighlighter):
             'Appositive noun phrase (NAn)': QColor("#F5F5F5")
         }
 
-    def set_phrases(self, phrases, categories):
-        self.phrases = phrases
-        self.categories = categories
-        self.rehighlight()
+        # 按分类编号预先生成格式
+        self.category_formats = []
+        for category in CATEGORY_NAMES:
+            format = QTextCharFormat()
+            format.setBackground(self.category_colors.get(category, QColor("#FFFFFF")))
+            self.category_formats.append(format)
+
+    def set_results(self, results, visible_blocks=range(0)):
+        """设置高亮结果：立即高亮可见的文本块，其余文本块留到空闲时处理"""
+        self.cancel()
+        self.results = results
+        self._generation = object()
+        document = self.document()
+        if document is None:
+            return
+
+        # 插入或删除行会改变文本块编号，此时重新开始空闲高亮
+        if self._watched_document is not document:
+            if self._watched_document is not None:
+                self._watched_document.blockCountChanged.disconnect(self._restart_pending)
+            document.blockCountChanged.connect(self._restart_pending)
+            self._watched_document = document
+
+        self.highlight_blocks(visible_blocks)
+        self._pending = self._iter_pending(visible_blocks)
+        self._timer.start()
+
+    def cancel(self):
+        """停止尚未完成的空闲高亮"""
+        self._timer.stop()
+        self._pending = None
+
+    def remove(self):
+        """停止高亮，清除文本块上的标记并从文档中移除，随后释放高亮器"""
+        self.cancel()
+        document = self.document()
+        if document is not None:
+            block = document.begin()
+            while block.isValid():
+                if isinstance(block.userData(), _HighlightMark):
+                    block.setUserData(None)
+                block = block.next()
+            self.setDocument(None)
+        self.results = PhraseResultStore()
+        self._generation = None
+
+        # 高亮器以文档为父对象，仅取消引用不会释放
+        self.deleteLater()
+
+    def highlight_blocks(self, block_numbers):
+        """立即高亮指定编号的文本块，已高亮过的跳过"""
+        document = self.document()
+        if document is None:
+            return
+
+        for number in block_numbers:
+            block = document.findBlockByNumber(number)
+            if not block.isValid() or self._is_done(block):
+                continue
+            # 每个文本块只保留一个标记，新一轮高亮时更新而不是重新创建
+            mark = block.userData()
+            if isinstance(mark, _HighlightMark):
+                mark.generation = self._generation
+            else:
+                block.setUserData(_HighlightMark(self._generation))
+            self.rehighlightBlock(block)
+
+    def _is_done(self, block):
+        mark = block.userData()
+        return isinstance(mark, _HighlightMark) and mark.generation is self._generation
+
+    def _restart_pending(self, block_count):
+        """文本块编号变化后从头检查，已高亮的文本块带有标记，会被直接跳过"""
+        if self._pending is not None:
+            self._pending = iter(range(block_count))
+
+    def _iter_pending(self, visible_blocks):
+        """从可见区域之后开始，依次生成其余文本块的编号"""
+        block_count = self.document().blockCount()
+        first = visible_blocks.start if visible_blocks else 0
+        last = visible_blocks.stop if visible_blocks else 0
+        yield from range(last, block_count)
+        yield from range(0, first)
+
+    def _highlight_slice(self):
+        """空闲时高亮一批文本块，超出时间上限后等待下一次空闲"""
+        if self._pending is None:
+            self._timer.stop()
+            return
+
+        deadline = time.perf_counter() + self.time_budget
+        for number in self._pending:
+            self.highlight_blocks((number,))
+            if time.perf_counter() >= deadline:
+                return
+        self.cancel()
 
     def highlightBlock(self, text):
-        if not self.phrases:
+        results = self.results
+        if not len(results):
             return
 
-        for phrase, category in zip(self.phrases, self.categories):
-            format = QTextCharFormat()
-            color = self.category_colors.get(category, QColor("#FFFFFF"))
-            format.setBackground(color)
+        # 尚未轮到的文本块不做处理，避免整篇文档同步高亮
+        if not self._is_done(self.currentBlock()):
+            return
+
+        # 文本块位置和 setFormat 使用 UTF-16 单位，结果偏移量使用字符位置
+        block_position = self.currentBlock().position()
+        block_start = results.from_utf16(block_position)
+        block_end = block_start + len(text)
+        for row in results.spans_in_range(block_start, block_end):
+            start = max(results.starts[row], block_start)
+            end = min(results.ends[row], block_end)
 
-            # 查找短语并高亮
-            index = text.lower().find(phrase.lower())
-            while index >= 0:
-                self.setFormat(index, len(phrase), format)
-                index = text.lower().find(phrase.lower(), index + len(phrase))
+            # 分析后文本被修改过时，偏移量不再对应原短语，跳过
+            if text[start - block_start:end - block_start] != results.source[start:end]:
+                continue
+            start = results.to_utf16(start) - block_position
+            end = results.to_utf16(end) - block_position
+            self.setFormat(start, end - start, self.category_formats[results.category_ids[row]])
 
 
 class PhraseAnalyzer:
@@ -92,95 +439,268 @@ class PhraseAnalyzer:
 
         return f"{token.text}({pos}, {dep})"
 
+    def analyze_document(self, source):
+        """分析整篇文本，返回 PhraseResultStore，偏移量相对于 source"""
+        text = source.strip()
+        offset = len(source) - len(source.lstrip())
+
+        results = PhraseResultStore(source)
+        for chunk in self.nlp(text).noun_chunks:
+            category_id, structure = self.analyze_chunk(chunk)
+            results.append(offset + chunk.start_char, offset + chunk.end_char,
+                           category_id, structure)
+        return results
+
+    def analyze_chunk(self, chunk):
+        """分析短语，返回分类编号和结构分析"""
+        structure = ' + '.join(self.get_word_details(token) for token in chunk)
+        return self.classify_category(chunk), structure
+
     def analyze_phrase(self, chunk):
         """分析短语结构"""
-        tokens = list(chunk)
-        word_details = [self.get_word_details(token) for token in tokens]
-        structure = ' + '.join(word_details)
-
-        # 获取基本分类和判断依据
-        category, reason = self.classify_phrase(chunk)
+        category_id, structure = self.analyze_chunk(chunk)
 
         return {
             'phrase': chunk.text,
             'structure': structure,
-            'category': category,
-            'reason': reason
+            'category': CATEGORY_NAMES[category_id],
+            'reason': format_reason(structure, category_id)
         }
 
     def classify_phrase(self, chunk):
-        """根据语法特征分类短语"""
+        """根据语法特征分类短语，返回分类名称和判断依据"""
+        category_id, structure = self.analyze_chunk(chunk)
+        return CATEGORY_NAMES[category_id], format_reason(structure, category_id)
+
+    def classify_category(self, chunk):
+        """根据语法特征分类短语，返回分类编号"""
         tokens = [(token.text, token.pos_, token.dep_) for token in chunk]
         text = chunk.text.lower()
 
-        # 生成词序分析
-        word_details = [self.get_word_details(token) for token in chunk]
-        details = f"词序分析: {' + '.join(word_details)}"
-
         # Pre-modifiers 分类
         if len(tokens) == 2 and tokens[0][1] == "ADJ" and tokens[1][1] == "NOUN":
-            return ("Attributive adjectives + Noun (AN)",
-                    f"{details}\n判断依据: 形容词(修饰语) + 名词(中心语)的基本结构")
+            return PhraseCategory.AN
 
         if (len(tokens) == 3 and
                 tokens[0][1] == "ADJ" and
                 tokens[1][1] == "ADJ" and
                 tokens[2][1] == "NOUN"):
-            return ("Adjectives + adjectives + Noun (AAN)",
-                    f"{details}\n判断依据: 双形容词(修饰语) + 名词(中心语)的结构")
+            return PhraseCategory.AAN
 
         if len(tokens) == 2 and all(token[1] == "NOUN" for token in tokens):
-            return ("Noun + Noun (NN)",
-                    f"{details}\n判断依据: 名词(修饰语) + 名词(中心语)的复合结构")
+            return PhraseCategory.NN
 
         if (len(tokens) == 3 and
                 all(token[1] == "NOUN" for token in tokens)):
-            return ("Noun + Noun + Noun (NNN)",
-                    f"{details}\n判断依据: 三个名词构成的复合结构")
+            return PhraseCategory.NNN
 
         if (len(tokens) == 3 and
                 tokens[0][1] == "ADJ" and
                 tokens[1][1] == "NOUN" and
                 tokens[2][1] == "NOUN"):
-            return ("Adjectives + Noun + Noun (ANN)",
-                    f"{details}\n判断依据: 形容词(修饰语) + 双名词复合结构")
+            return PhraseCategory.ANN
 
         if any(token[2] == "poss" for token in tokens):
-            return ("Possessive nouns + Noun (PnN)",
-                    f"{details}\n判断依据: 包含所有格标记的名词修饰结构")
+            return PhraseCategory.PNN
 
         if any(token[1] == "VERB" and token[2] == "amod" for token in tokens):
-            return ("Participles + Noun (PN)",
-                    f"{details}\n判断依据: 分词(作形容词用) + 名词的结构")
+            return PhraseCategory.PN
 
         if any(token[2] == "compound" for token in tokens):
-            return ("Compounds + Noun (CN)",
-                    f"{details}\n判断依据: 复合词结构")
+            return PhraseCategory.CN
 
         if (len(tokens) == 3 and
                 tokens[0][1] == "ADV" and
                 (tokens[1][1] == "ADJ" or tokens[1][1] == "VERB") and
                 tokens[2][1] == "NOUN"):
-            return ("Adverb + Adjective/Participle + Noun (aA/PN)",
-                    f"{details}\n判断依据: 副词 + 形容词/分词 + 名词的结构")
+            return PhraseCategory.AAPN
 
         # Post-modifiers 分类
         if " of " in text:
-            return ("Of phrase as noun post-modifiers (PrepOF)",
-                    f"{details}\n判断依据: 包含'of'介词短语的后置修饰结构")
+            return PhraseCategory.PREP_OF
 
         prepositions = {"to", "in", "at", "by", "with", "for", "from", "on", "about"}
         if any(f" {prep} " in text for prep in prepositions):
-            return ("Other prepositional phrases",
-                    f"{details}\n判断依据: 包含其他介词的后置修饰结构")
+            return PhraseCategory.PREP_OTHER
 
         if (text.startswith("a ") or
                 text.startswith("an ") or
                 text.startswith("the ")):
-            return ("Appositive noun phrase (NAn)",
-                    f"{details}\n判断依据: 同位语名词短语结构")
+            return PhraseCategory.NAN
+
+        return PhraseCategory.OTHER
+
+
+def available_cpus():
+    """返回当前进程可以使用的 CPU 数，考虑 CPU 亲和性设置"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def available_memory():
+    """返回系统当前可用的物理内存字节数，无法获取时返回 None"""
+    try:
+        with open("/proc/meminfo") as file:
+            for line in file:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def read_text_file(file_path):
+    """按 UTF-8 读取文本文件"""
+    with open(file_path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def _file_size(file_path):
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return 0
+
+
+# 子进程通过 fork 继承的分析器，模型权重与父进程写时复制共享
+_worker_analyzer = None
+
+
+def _analyze_in_worker(task):
+    """子进程中读取并分析一个文件，只返回紧凑的列数据而不是 Doc 对象"""
+    index, file_path = task
+    try:
+        return _worker_analyzer.analyze_document(read_text_file(file_path)).columns(), None
+    except Exception as e:
+        return None, str(e)
+
+
+class PhraseWorkerPool:
+    """批量分析用的多进程池
+
+    模型只在父进程中加载一次，子进程通过 fork 共享模型内存；文件按大小从大到小
+    分发，使各进程负载均衡。子进程数受可用内存限制，子进程意外退出（如内存不足
+    被系统终止）时其余文件都标记为失败。只在 Linux 上使用多进程：macOS 上在
+    QApplication 初始化之后 fork 并不安全，Windows 不支持 fork，这些平台上退化为
+    在当前进程中逐个分析。
+    """
+    # 每轮分给每个子进程的文件数。spaCy 的词表会随新文本不断增长，写入会让共享的
+    # 模型页面逐渐变成子进程私有的副本，每轮结束后换用新进程以恢复共享
+    max_tasks_per_child = 20
+
+    # 估算子进程的内存占用：基础占用加上按最大文件字符数计算的部分
+    # （spaCy 分析时约每 10 万字符占用 1GB 临时内存）
+    worker_base_memory = 256 * 1024 * 1024
+    memory_per_char = 10000
+
+    # 等待子进程结果时的轮询间隔（秒）
+    poll_interval = 0.05
+
+    broken_message = "分析进程意外退出（可能内存不足）"
+
+    def __init__(self, analyzer, processes=None):
+        self.analyzer = analyzer
+        self.processes = processes or available_cpus()
+        self.forking = False
+
+    def __enter__(self):
+        global _worker_analyzer
+        if self.processes > 1 and sys.platform.startswith("linux"):
+            _worker_analyzer = self.analyzer
+            gc.collect()
+            self.forking = True
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global _worker_analyzer
+        if self.forking:
+            gc.unfreeze()
+            self.forking = False
+        _worker_analyzer = None
+
+    def _round_processes(self, largest_size):
+        """按可用内存和本轮最大文件估算可以同时运行的子进程数"""
+        processes = self.processes
+        memory = available_memory()
+        if memory is not None:
+            worker_memory = self.worker_base_memory + largest_size * self.memory_per_char
+            processes = min(processes, max(1, memory // worker_memory))
+        return processes
+
+    def analyze_files(self, file_paths, wait=None, cancelled=None):
+        """分析多个文件，按完成顺序生成 (序号, PhraseResultStore, 错误信息)
+
+        某个文件出错时结果为 None 并附带错误信息，不影响其他文件。等待结果期间
+        会反复调用 wait，供界面处理事件；cancelled 返回 True 时停止分发新的文件，
+        正在分析的文件会在后台分析完毕后退出。
+        """
+        # 大文件优先分发，小文件填补各进程的空闲时间
+        tasks = sorted(enumerate(file_paths), key=lambda task: _file_size(task[1]), reverse=True)
+
+        if not self.forking:
+            for index, file_path in tasks:
+                if cancelled is not None and cancelled():
+                    return
+                store, error = None, None
+                try:
+                    store = self.analyzer.analyze_document(read_text_file(file_path))
+                except Exception as e:
+                    error = str(e)
+                yield index, store, error
+                if wait is not None:
+                    wait()
+            return
+
+        context = multiprocessing.get_context("fork")
+        position = 0
+        while position < len(tasks):
+            processes = self._round_processes(_file_size(tasks[position][1]))
+            round_tasks = tasks[position:position + processes * self.max_tasks_per_child]
+            position += len(round_tasks)
 
-        return ("Other", f"{details}\n判断依据: 不符合上述任何分类模式的其他结构")
+            # 冻结现有对象，避免子进程中的垃圾回收改写共享页面
+            gc.freeze()
+            executor = ProcessPoolExecutor(processes, mp_context=context)
+            try:
+                pending = {executor.submit(_analyze_in_worker, task): task for task in round_tasks}
+                while pending:
+                    if cancelled is not None and cancelled():
+                        return
+
+                    done, _ = futures_wait(pending, timeout=self.poll_interval,
+                                           return_when=FIRST_COMPLETED)
+                    if not done and wait is not None:
+                        wait()
+
+                    broken = False
+                    for future in done:
+                        index, file_path = pending.pop(future)
+                        try:
+                            columns, error = future.result()
+                        except BrokenProcessPool:
+                            columns, error = None, self.broken_message
+                            broken = True
+                        except Exception as e:
+                            columns, error = None, str(e)
+
+                        # 子进程只返回列数据，原文在父进程中重新读取，用完即释放
+                        store = None
+                        if error is None:
+                            try:
+                                store = PhraseResultStore.from_columns(read_text_file(file_path), columns)
+                            except Exception as e:
+                                error = str(e)
+                        yield index, store, error
+
+                    # 子进程被意外终止后进程池无法继续使用，其余文件全部标记为失败
+                    if broken:
+                        for index, file_path in list(pending.values()) + tasks[position:]:
+                            yield index, None, self.broken_message
+                        return
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
 
 
 class PhraseExtractorApp(QMainWindow):
@@ -188,8 +708,8 @@ class PhraseExtractorApp(QMainWindow):
         super().__init__()
         self.analyzer = PhraseAnalyzer()
         self.highlighter = None
-        self.extracted_phrases = []
-        self.extracted_categories = []
+        self.results = PhraseResultStore()
+        self.batch_cancelled = False
         self.initUI()
         self.setup_style()
 
@@ -329,11 +849,14 @@ class PhraseExtractorApp(QMainWindow):
                 font-size: 14px;
             }
         """)
+        self.text_input.verticalScrollBar().valueChanged.connect(self.highlight_visible_blocks)
+        self.text_input.viewport().installEventFilter(self)
         layout.addWidget(self.text_input)
 
         # 按钮区域
         button_widget = QWidget()
         button_layout = QHBoxLayout(button_widget)
+        self.action_buttons = []
 
         buttons = [
             ("导入文件", self.load_file, "#3498DB"),
@@ -342,6 +865,7 @@ class PhraseExtractorApp(QMainWindow):
             ("清除高亮", self.clear_highlights, "#95A5A6"),
             ("清空内容", self.clear_text, "#95A5A6"),
             ("导出结果", self.export_results, "#9B59B6"),
+            ("批量分析", self.batch_analyze, "#1ABC9C"),
             ("使用帮助", self.show_help, "#F39C12")  # 添加帮助按钮
         ]
 
@@ -362,8 +886,21 @@ class PhraseExtractorApp(QMainWindow):
             """)
             btn.clicked.connect(slot)  # 直接连接到方法
             button_layout.addWidget(btn)
+            self.action_buttons.append(btn)
 
         layout.addWidget(button_widget)
+
+        # 批量分析进度条和取消按钮，仅在批量分析时显示
+        self.progress_widget = QWidget()
+        progress_layout = QHBoxLayout(self.progress_widget)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFormat("批量分析 %v/%m")
+        progress_layout.addWidget(self.progress_bar)
+        cancel_btn = QPushButton("取消")
+        cancel_btn.clicked.connect(self.cancel_batch)
+        progress_layout.addWidget(cancel_btn)
+        self.progress_widget.hide()
+        layout.addWidget(self.progress_widget)
         return widget
     def create_result_section(self):
         """创建结果显示区域"""
@@ -383,11 +920,11 @@ class PhraseExtractorApp(QMainWindow):
         layout.addWidget(result_title)
 
         # 结果表格
-        self.result_table = QTableWidget()
-        self.result_table.setColumnCount(4)
-        self.result_table.setHorizontalHeaderLabels(["短语", "结构分析", "分类", "判断依据"])
+        self.result_model = PhraseTableModel(self)
+        self.result_table = QTableView()
+        self.result_table.setModel(self.result_model)
         self.result_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 border: 2px solid #BDC3C7;
                 border-radius: 5px;
                 background-color: white;
@@ -428,59 +965,77 @@ class PhraseExtractorApp(QMainWindow):
 
     def analyze_text(self):
         """分析文本"""
-        text = self.text_input.toPlainText().strip()
-        if not text:
+        source = self.text_input.toPlainText()
+        if not source.strip():
             QMessageBox.warning(self, "警告", "请输入或加载文本！")
             return
 
         try:
             # 清除现有的高亮和结果
             self.clear_highlights()
-            self.result_table.setRowCount(0)
-            self.extracted_phrases = []
-            self.extracted_categories = []
-
-            # 使用spaCy进行分析
-            doc = self.analyzer.nlp(text)
-
-            # 分析每个名词短语
-            row = 0
-            for chunk in doc.noun_chunks:
-                analysis = self.analyzer.analyze_phrase(chunk)
+            self.results = PhraseResultStore()
+            self.result_model.set_store(self.results)
 
-                self.extracted_phrases.append(analysis['phrase'])
-                self.extracted_categories.append(analysis['category'])
+            # 使用spaCy分析每个名词短语，偏移量相对于输入框全文
+            results = self.analyzer.analyze_document(source)
 
-                # 添加到表格
-                self.result_table.insertRow(row)
-                self.result_table.setItem(row, 0, QTableWidgetItem(analysis['phrase']))
-                self.result_table.setItem(row, 1, QTableWidgetItem(analysis['structure']))
-                self.result_table.setItem(row, 2, QTableWidgetItem(analysis['category']))
-                self.result_table.setItem(row, 3, QTableWidgetItem(analysis['reason']))
+            # 添加到表格
+            self.results = results
+            self.result_model.set_store(results)
 
-                row += 1
-
-            QMessageBox.information(self, "完成", f"分析完成，共找到 {row} 个名词短语！")
+            QMessageBox.information(self, "完成", f"分析完成，共找到 {len(results)} 个名词短语！")
 
         except Exception as e:
             QMessageBox.critical(self, "错误", f"分析文本时出错：{e}")
 
     def highlight_phrases(self):
         """高亮显示短语"""
-        if not self.extracted_phrases:
+        if not len(self.results):
             QMessageBox.warning(self, "警告", "请先分析文本！")
             return
 
+        # 分析后文本被修改过时，结果中的位置已失效，需要重新分析
+        if self.text_input.toPlainText() != self.results.source:
+            reply = QMessageBox.question(
+                self, "提示", "文本在分析后已被修改，需要重新分析才能正确高亮。是否立即重新分析？",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes
+            )
+            if reply != QMessageBox.Yes:
+                return
+            self.analyze_text()
+            if not len(self.results) or self.text_input.toPlainText() != self.results.source:
+                return
+
         # 创建新的高亮器
+        self.clear_highlights()
         self.highlighter = PhraseHighlighter(self.text_input.document())
-        self.highlighter.set_phrases(self.extracted_phrases, self.extracted_categories)
+        self.highlighter.set_results(self.results, self.visible_blocks())
 
         QMessageBox.information(self, "完成", "短语已在文本中高亮显示！")
 
+    def visible_blocks(self):
+        """返回输入框中当前可见的文本块编号范围"""
+        viewport = self.text_input.viewport()
+        first = self.text_input.cursorForPosition(QPoint(0, 0)).blockNumber()
+        last = self.text_input.cursorForPosition(
+            QPoint(viewport.width() - 1, viewport.height() - 1)).blockNumber()
+        return range(first, last + 1)
+
+    def highlight_visible_blocks(self):
+        """滚动或调整大小时优先高亮新进入可见区域的文本块"""
+        if self.highlighter:
+            self.highlighter.highlight_blocks(self.visible_blocks())
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Resize and obj is self.text_input.viewport():
+            # 等输入框按新尺寸重新排版后再计算可见区域
+            QTimer.singleShot(0, self.highlight_visible_blocks)
+        return super().eventFilter(obj, event)
+
     def clear_highlights(self):
         """清除高亮"""
         if self.highlighter:
-            self.highlighter.setDocument(None)
+            self.highlighter.remove()
             self.highlighter = None
 
     def show_help(self):
@@ -569,6 +1124,7 @@ class PhraseExtractorApp(QMainWindow):
                 <li>点击"分析短语"按钮进行短语识别和分类</li>
                 <li>点击"高亮显示"可在原文中标记所有短语</li>
                 <li>点击"清除高亮"可取消文本中的高亮显示</li>
+                <li>点击"批量分析"可一次选择多个txt文件，分析结果直接导出到CSV文件</li>
             </ul>
 
             <p><b>3. 结果查看：</b></p>
@@ -647,14 +1203,89 @@ class PhraseExtractorApp(QMainWindow):
     def clear_text(self):
         """清空文本和结果"""
         self.text_input.clear()
-        self.result_table.setRowCount(0)
         self.clear_highlights()
-        self.extracted_phrases = []
-        self.extracted_categories = []
+        self.results = PhraseResultStore()
+        self.result_model.set_store(self.results)
+
+    def batch_analyze(self):
+        """批量分析多个文本文件并导出结果"""
+        options = QFileDialog.Options()
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self, "选择文本文件", "", "文本文件 (*.txt);;所有文件 (*)", options=options
+        )
+        if not file_paths:
+            return
+
+        save_path, _ = QFileDialog.getSaveFileName(
+            self, "保存结果", "", "CSV文件 (*.csv);;所有文件 (*)", options=options
+        )
+        if not save_path:
+            return
+
+        total = 0
+        finished = 0
+        failures = []
+        self.batch_cancelled = False
+        self.progress_bar.setRange(0, len(file_paths))
+        self.progress_bar.setValue(0)
+        self.progress_widget.show()
+
+        # 分析过程中保持界面响应，但禁用其他操作按钮，避免重复触发
+        for btn in self.action_buttons:
+            btn.setEnabled(False)
+        try:
+            with open(save_path, mode="w", newline="", encoding="utf-8-sig") as file:
+                writer = csv.writer(file)
+                writer.writerow(["文件", "短语", "结构分析", "分类", "判断依据"])
+
+                # 每个文件分析完成后立即写出结果，不在内存中保留所有原文和结果
+                processes = min(len(file_paths), available_cpus())
+                with PhraseWorkerPool(self.analyzer, processes=processes) as pool:
+                    results = pool.analyze_files(file_paths, wait=QApplication.processEvents,
+                                                 cancelled=lambda: self.batch_cancelled)
+                    for index, store, error in results:
+                        name = os.path.basename(file_paths[index])
+                        if error is None:
+                            writer.writerows((name,) + row for row in store.rows())
+                            total += len(store)
+                        else:
+                            failures.append(f"{name}：{error}")
+
+                        finished += 1
+                        self.progress_bar.setValue(finished)
+                        QApplication.processEvents()
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"批量分析时出错：{e}")
+            return
+        finally:
+            self.progress_widget.hide()
+            for btn in self.action_buttons:
+                btn.setEnabled(True)
+
+        if self.batch_cancelled:
+            message = (f"批量分析已取消，已完成的 {finished - len(failures)} 个文件共找到 {total} 个名词短语，"
+                       f"结果已导出到：{save_path}")
+        else:
+            message = (f"批量分析完成，{len(file_paths) - len(failures)} 个文件共找到 {total} 个名词短语，"
+                       f"结果已导出到：{save_path}")
+        if failures:
+            message += f"\n\n以下 {len(failures)} 个文件处理失败：\n" + "\n".join(failures)
+            QMessageBox.warning(self, "完成", message)
+        else:
+            QMessageBox.information(self, "完成", message)
+
+    def cancel_batch(self):
+        """取消正在进行的批量分析"""
+        self.batch_cancelled = True
+
+    def closeEvent(self, event):
+        # 关闭窗口时停止正在进行的批量分析
+        self.batch_cancelled = True
+        super().closeEvent(event)
 
     def export_results(self):
         """导出分析结果"""
-        if self.result_table.rowCount() == 0:
+        if not len(self.results):
             QMessageBox.warning(self, "警告", "没有可导出的结果！")
             return
 
@@ -672,12 +1303,7 @@ class PhraseExtractorApp(QMainWindow):
                     writer.writerow(headers)
 
                     # 写入数据
-                    for row in range(self.result_table.rowCount()):
-                        row_data = []
-                        for col in range(self.result_table.columnCount()):
-                            item = self.result_table.item(row, col)
-                            row_data.append(item.text() if item else "")
-                        writer.writerow(row_data)
+                    writer.writerows(self.results.rows())
 
                 QMessageBox.information(self, "完成", f"结果已成功导出到：{file_path}")
             except Exception as e: